@@ -1,4 +1,5 @@
 import spacy
+import metrics
 from collections import Counter
 
 nlp = spacy.load('en')
@@ -6,19 +7,13 @@ nlp.vocab["\n"].is_stop = True
 nlp.vocab["'s"].is_stop = True
 nlp.vocab[" "].is_stop = True
 
-def analyze(articleText, comments):
+def article_tokens(articleText):
     """
-    Perform text analysis on passed article text and list of comment triples (from client.py)
-    Returns a pair of keyword lists, then a dictionary.
-    The first list is those which are common between the comments and the article.
-    The second is those which only appear in the comments.
-    The dictionary associates keyword strings to a comment source pair (commentID, commentPermalink).
-
-    Each keyword list is itself a list of quads: (commentID, commentPermalink, keyword, frequency)
-    commentID and commentPermalink point to some comment which referred to the keyword.
+    Returns the set of keywords (tokens and named entities) in the passed article text.
     """
 
-    article = nlp(articleText)
+    with metrics.stage("ner"):
+        article = nlp(articleText)
 
     # Remove named entities from articleText (saving them for later)
     articleEnts = article.ents
@@ -27,16 +22,15 @@ def analyze(articleText, comments):
     # Then replace all null zeros with empty strings (and handle newlines in the process)
     articleText = articleText.replace(chr(0), '').replace("\n", " ")
     # And re-analyze articleText (now sure that we don't have duplication between tokens and articleEnts).
-    article = nlp(articleText)
+    with metrics.stage("tokenization"):
+        article = nlp(articleText)
 
-    articleTokens  = []
-    commentTokens  = []
-    commentSources = {}
+    articleTokens  = set()
 
     for token in article:
         if not token.is_stop and not token.like_num and not token.is_punct:
-            articleTokens.append(token.lower_)
-            
+            articleTokens.add(token.lower_)
+
     for ent in articleEnts:
         if ent.text in spacy.lang.en.stop_words.STOP_WORDS:
             continue
@@ -45,61 +39,110 @@ def analyze(articleText, comments):
             continue
         except:
             pass
-        articleTokens.append(ent.text)
-
-    # Process all comments at once for named entities
-    comments=[(comment[0], comment[1], comment[2], nlp(comment[2]).ents) for comment in comments]
-    l=[]
-
-    # Perform named entity removal over comments (See above)
-    # Then replace original comment text with the tokenized version
-    for comment in comments:
-        temp=comment[2]
-        for ent in comment[3]:
-            temp=temp[:ent.start_char]+(chr(0)*len(ent.text))+temp[ent.end_char:]
-        temp=nlp(temp.replace(chr(0), '').replace("\n", " "))
-        l.append((comment[0], comment[1], temp, comment[3]))
-
-    comments=l
-    l=None
-
-    pos_whitelist = ["NOUN", "PROPN"]
-
-    for comment in comments:
-        for token in comment[2]:
-            if not token.is_stop and not token.lower_.isspace() and not token.like_num and not token.is_punct and token.pos_ in pos_whitelist:
-                commentTokens.append(token.lower_)
-                if not token.lower_ in commentSources:
-                    commentSources[token.lower_]=[(comment[0], comment[1]),]
+        articleTokens.add(ent.text)
+
+    return articleTokens
+
+class Analysis:
+    """
+    An analysis of an article and its comments, which can be given the comments a batch at a time.
+    The results are available (ranked over the comments given so far) at any point, from results().
+    """
+
+    def __init__(self, articleText):
+        self.articleTokens  = article_tokens(articleText)
+        self.commentTokens  = Counter()
+        self.commentSources = {}
+        self.comments = 0 # How many comments have been analyzed
+
+    def add_comments(self, comments):
+        """
+        Analyzes the passed list of comment triples (from client.py), adding them to the analysis.
+        """
+
+        # Process all comments at once for named entities
+        with metrics.stage("ner"):
+            comments=[(comment[0], comment[1], comment[2], nlp(comment[2]).ents) for comment in comments]
+        l=[]
+
+        # Perform named entity removal over comments (See article_tokens)
+        # Then replace original comment text with the tokenized version
+        with metrics.stage("tokenization"):
+            for comment in comments:
+                temp=comment[2]
+                for ent in comment[3]:
+                    temp=temp[:ent.start_char]+(chr(0)*len(ent.text))+temp[ent.end_char:]
+                temp=nlp(temp.replace(chr(0), '').replace("\n", " "))
+                l.append((comment[0], comment[1], temp, comment[3]))
+
+        comments=l
+        l=None
+
+        pos_whitelist = ["NOUN", "PROPN"]
+
+        commentTokens  = self.commentTokens
+        commentSources = self.commentSources
+        for comment in comments:
+            for token in comment[2]:
+                if not token.is_stop and not token.lower_.isspace() and not token.like_num and not token.is_punct and token.pos_ in pos_whitelist:
+                    commentTokens[token.lower_]+=1
+                    if not token.lower_ in commentSources:
+                        commentSources[token.lower_]=[(comment[0], comment[1]),]
+                    else:
+                        commentSources[token.lower_].append((comment[0], comment[1]))
+            for ent in comment[3]:
+                if ent.text in spacy.lang.en.stop_words.STOP_WORDS or ent.text.isspace():
+                    continue
+                try:
+                    float(ent.text)
+                    continue
+                except:
+                    pass
+
+                commentTokens[ent.text]+=1
+                if not ent.text in commentSources:
+                    commentSources[ent.text]=[(comment[0], comment[1]),]
                 else:
-                    commentSources[token.lower_].append((comment[0], comment[1]))
-        for ent in comment[3]:
-            if ent.text in spacy.lang.en.stop_words.STOP_WORDS or ent.text.isspace():
-                continue
-            try:
-                float(ent.text)
-                continue
-            except:
-                pass
-
-            commentTokens.append(ent.text)
-            if not ent.text in commentSources:
-                commentSources[ent.text]=[(comment[0], comment[1]),]
+                    commentSources[ent.text].append((comment[0], comment[1]))
+
+        self.comments+=len(comments)
+
+    def results(self, top=None):
+        """
+        Returns the results of the analysis so far, in the same form as analyze().
+        If top is given, only that many of the most common keywords are ranked.
+        """
+
+        with metrics.stage("ranking"):
+            return self._rank(top)
+
+    def _rank(self, top):
+        related=[]
+        unrelated=[]
+        for el in self.commentTokens.most_common(top):
+            source=self.commentSources[el[0]][0]
+            keyword=(source[0], source[1], el[0], el[1])
+            if el[0] in self.articleTokens:
+                related.append(keyword)
             else:
-                commentSources[ent.text].append((comment[0], comment[1]))
-
-    commentTokens=Counter(commentTokens)
-
-    related=[]
-    unrelated=[]
-    for el in commentTokens.most_common():
-        source=commentSources[el[0]][0]
-        keyword=(source[0], source[1], el[0], el[1])
-        if el[0] in articleTokens:
-            related.append(keyword)
-        else:
-            unrelated.append(keyword)
-    return (related, unrelated, commentSources)
+                unrelated.append(keyword)
+        return (related, unrelated, self.commentSources)
+
+def analyze(articleText, comments):
+    """
+    Perform text analysis on passed article text and list of comment triples (from client.py)
+    Returns a pair of keyword lists, then a dictionary.
+    The first list is those which are common between the comments and the article.
+    The second is those which only appear in the comments.
+    The dictionary associates keyword strings to a comment source pair (commentID, commentPermalink).
+
+    Each keyword list is itself a list of quads: (commentID, commentPermalink, keyword, frequency)
+    commentID and commentPermalink point to some comment which referred to the keyword.
+    """
+
+    analysis = Analysis(articleText)
+    analysis.add_comments(comments)
+    return analysis.results()
 
 if __name__=="__main__" and False:
     # Just take arguments from argv and run analyze on them
@@ -2,10 +2,12 @@
 
 import praw
 import os
+import re
 import sys
 from time import sleep
 import traceback
 import scraper
+import metrics
 from configparser import ConfigParser
 
 # On Python 3.7, output utf-8
@@ -51,6 +53,23 @@ def submission(target):
 
     return out
 
+def submission_id(target):
+    """
+    Returns the ID of the Reddit submission the given target refers to, without contacting Reddit.
+    The target can either be a thread URL or a thread ID, as accepted by submission().
+    If a URL's ID can't be found, the URL itself is returned, so that it at least identifies itself.
+    """
+
+    target=target.strip()
+    if "reddit.com" in target:
+        match=re.search(r"/comments/([A-Za-z0-9]+)", target)
+        if match is None:
+            return target
+        target=match.group(1)
+
+    # IDs are base 36, which Reddit always writes in lowercase
+    return target.lower()
+
 def connected_comments(sub):
     """
     Returns a collection of string tuples, where each tuple consists of a comment ID, comment URL, and the contents of the comment.
@@ -82,21 +101,45 @@ def connected_comments2(sub, limit=32):
     # Iterate over all comments, and print them all out
     # Remove 'more comments' and the like (allowing up to 50 failed requests before error)
     n=0
-    while True:
-        try:
-            sub.comments.replace_more(limit=limit)
-            break
-        except:
-            if n<50:
-                n+=1
-                sleep(0.1*n) # Sleep for 100ms to allow for other work to be done/allow transient conditions to resolve themselves
-            else:
-                raise # We tried 50 times, but still couldn't do what was asked.
-
-    all=sub.comments.list()
+    with metrics.stage("replace_more"):
+        while True:
+            try:
+                sub.comments.replace_more(limit=limit)
+                break
+            except:
+                if n<50:
+                    n+=1
+                    sleep(0.1*n) # Sleep for 100ms to allow for other work to be done/allow transient conditions to resolve themselves
+                else:
+                    raise # We tried 50 times, but still couldn't do what was asked.
+
+    with metrics.stage("reddit_fetch"):
+        all=sub.comments.list()
 
     return ((comment.id, comment.permalink, comment.body) for comment in all)
 
+def connected_comment_batches(sub, limit=32):
+    """
+    Yields the comments of the given Reddit submission in batches, as they're fetched.
+    Each batch is a list of string tuples, as returned by connected_comments2().
+    Accepts a Reddit submission object, and a limit as accepted by connected_comments2().
+    The first batch is the comments which came with the submission, which is available right away.
+    The second is the rest, once the 'more comments' have been fetched.
+    """
+
+    # The comments that came with the submission (leaving out the 'more comments' placeholders)
+    seen=set()
+    first=[]
+    with metrics.stage("reddit_fetch"):
+        for comment in sub.comments.list():
+            if hasattr(comment, "body"):
+                seen.add(comment.id)
+                first.append((comment.id, comment.permalink, comment.body))
+    yield first
+
+    # Then the rest of them
+    yield [comment for comment in connected_comments2(sub, limit) if comment[0] not in seen]
+
 def comments2(target, limit=32):
     """
     Returns a collection of string tuples, where each tuple consists of a comment ID, comment URL, and the contents of the comment.
@@ -116,7 +159,11 @@ def connected_scrape(sub):
     (see the scrape() variant if you have a Reddit target, as accepted by submission() )
     """
 
-    return scraper.scrape(sub.url)
+    # Submissions are fetched from Reddit lazily, when their attributes are first used
+    with metrics.stage("reddit_fetch"):
+        url=sub.url
+    with metrics.stage("scrape"):
+        return scraper.scrape(url)
 
 def scrape(target):
     """